@@ -1,19 +1,37 @@
 import argparse
 import asyncio
 import logging
+import logging.handlers
+import os
+import queue
+import signal
+import ssl
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Optional
 
-from aiohttp import web
+import aiogram
+import certifi
+from aiohttp import ClientSession, TCPConnector, web
+from aiohttp.hdrs import USER_AGENT
+from aiohttp.http import SERVER_SOFTWARE
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.enums import ParseMode
+from aiogram.fsm.storage.memory import SimpleEventIsolation
 from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 
 from app import config
+from app import state
 from app.handlers import callbacks as h_callbacks
 from app.handlers import logs as h_logs
 from app.handlers import search as h_search
+from app.services import ittour
+
+try:
+    import orjson
+except ImportError:  # без orjson лишається stdlib json aiogram
+    orjson = None
 
 
 # ---------------------------
@@ -62,44 +80,129 @@ def parse_args() -> RunSettings:
 # Logging
 # ---------------------------
 
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+
 def setup_logging() -> None:
+    """
+    Запис у файл/консоль робить фоновий QueueListener,
+    а корутини лише кладуть записи в чергу — без блокуючого write() на event loop.
+    """
+    global _log_listener
+
+    os.makedirs(config.LOG_DIR, exist_ok=True)
+    formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    file_h = logging.FileHandler(config.LOG_FILE, encoding="utf-8")
+    stream_h = logging.StreamHandler()
+    for h in (file_h, stream_h):
+        h.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
     logging.basicConfig(
         level=logging.INFO,
-        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
-        handlers=[
-            logging.FileHandler(config.LOG_FILE, encoding="utf-8"),
-            logging.StreamHandler(),
-        ],
+        handlers=[logging.handlers.QueueHandler(log_queue)],
     )
 
+    _log_listener = logging.handlers.QueueListener(log_queue, file_h, stream_h, respect_handler_level=True)
+    _log_listener.start()
+
+
+def stop_logging() -> None:
+    # дописує все, що лишилось у черзі
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
 
 # ---------------------------
 # Bot / Dispatcher
 # ---------------------------
 
+# максимум, який дозволяє Telegram (за замовчуванням 40); під нього ж — пул з'єднань на хост
+WEBHOOK_MAX_CONNECTIONS = 100
+
+def _orjson_dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
+
+class TelegramSession(AiohttpSession):
+    """
+    Сесія до api.telegram.org з більшим пулом і довшим keep-alive:
+    відповіді в чат перевикористовують TLS-з'єднання замість нового handshake.
+    """
+
+    async def create_session(self) -> ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                connector=TCPConnector(
+                    ssl=ssl.create_default_context(cafile=certifi.where()),
+                    limit=200,
+                    limit_per_host=WEBHOOK_MAX_CONNECTIONS,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=75,
+                ),
+                headers={USER_AGENT: f"{SERVER_SOFTWARE} aiogram/{aiogram.__version__}"},
+            )
+        return self._session
+
+
+def build_session() -> AiohttpSession:
+    json_kwargs: dict[str, Any] = {}
+    if orjson is not None:
+        # і вихідні запити, і вхідні апдейти вебхука (SimpleRequestHandler бере session.json_loads)
+        json_kwargs = {"json_loads": orjson.loads, "json_dumps": _orjson_dumps}
+    return TelegramSession(**json_kwargs)
+
+
 def build_bot() -> Bot:
     token = config.TELEGRAM_BOT_TOKEN
     if not token:
         raise SystemExit("TELEGRAM_BOT_TOKEN is required")
     return Bot(
         token=token,
+        session=build_session(),
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
 
 
+async def _load_chat_state(handler, event, data):
+    # state чату з SQLite — у пам'ять до хендлерів (у потоці), далі get/set працюють без диска
+    chat = data.get("event_chat")
+    if chat is not None:
+        await state.load(chat.id)
+    return await handler(event, data)
+
+
+_dp: Optional[Dispatcher] = None
+
+
 def build_dispatcher() -> Dispatcher:
-    dp = Dispatcher()
-    dp.include_router(h_search.router)
-    dp.include_router(h_logs.router)
-    dp.include_router(h_callbacks.router)
-    return dp
+    """
+    Один Dispatcher на процес: роутер можна підключити лише до одного батька,
+    тож повторний виклик повертає вже зібраний екземпляр.
+    """
+    global _dp
+    if _dp is not None:
+        return _dp
+
+    # апдейти обробляються конкурентно (tasks), але в межах одного чату — по черзі,
+    # щоб не було гонок у state
+    _dp = Dispatcher(events_isolation=SimpleEventIsolation())
+    if config.STATE_DB:
+        # після вбудованих outer-middleware: event_chat уже визначено, апдейт чату вже ізольовано
+        _dp.update.outer_middleware(_load_chat_state)
+    for r in (h_search.router, h_logs.router, h_callbacks.router):
+        _dp.include_router(r)
+    return _dp
 
 
 # ---------------------------
 # Webhook lifecycle
 # ---------------------------
 
-async def set_webhook(bot: Bot, webhook_url: str) -> None:
+
+async def set_webhook(bot: Bot, dp: Dispatcher, webhook_url: str) -> None:
     if not config.WEBHOOK_SECRET:
         raise SystemExit("WEBHOOK_SECRET is required for webhook mode")
 
@@ -107,6 +210,8 @@ async def set_webhook(bot: Bot, webhook_url: str) -> None:
         webhook_url,
         secret_token=config.WEBHOOK_SECRET,
         drop_pending_updates=True,
+        max_connections=WEBHOOK_MAX_CONNECTIONS,
+        allowed_updates=dp.resolve_used_update_types(),
     )
     logging.info("Webhook set: %s", webhook_url)
 
@@ -140,14 +245,20 @@ async def run_webhook(bot: Bot, dp: Dispatcher, settings: RunSettings) -> None:
     if not webhook_url:
         raise SystemExit("WEBHOOK_URL is required for webhook mode (or pass --webhook-url)")
 
-    await set_webhook(bot, webhook_url)
+    await set_webhook(bot, dp, webhook_url)
 
     app = build_web_app(bot, dp, path=settings.path)
 
-    runner = web.AppRunner(app)
+    # access_log=None: без форматування/запису рядка лога на кожен апдейт від Telegram
+    runner = web.AppRunner(app, access_log=None, handle_signals=False)
     await runner.setup()
 
-    site = web.TCPSite(runner, host=settings.host, port=settings.port)
+    site = web.TCPSite(
+        runner,
+        host=settings.host,
+        port=settings.port,
+        backlog=1024,
+    )
     await site.start()
 
     logging.info(
@@ -160,7 +271,15 @@ async def run_webhook(bot: Bot, dp: Dispatcher, settings: RunSettings) -> None:
 
     # Правильний “hold” без while True:
     # aiohttp runner тримає цикл, але нам треба не завершувати main.
+    # Цикл простоює до SIGTERM/SIGINT — жодних таймерів між запитами.
     stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            # Windows: сигнали через loop не підтримуються, лишається KeyboardInterrupt
+            pass
     try:
         await stop_event.wait()
     finally:
@@ -172,23 +291,33 @@ async def run_webhook(bot: Bot, dp: Dispatcher, settings: RunSettings) -> None:
 # Polling
 # ---------------------------
 
+POLLING_TIMEOUT = 30  # секунд, передається як getUpdates?timeout=
+
+
 async def run_polling(bot: Bot, dp: Dispatcher) -> None:
     # Якщо раніше був webhook — краще прибрати
     await delete_webhook(bot)
     logging.info("Starting polling mode…")
-    await dp.start_polling(bot)
+    # довгий long-poll: менше порожніх getUpdates, Telegram фільтрує непотрібні типи апдейтів
+    await dp.start_polling(
+        bot,
+        polling_timeout=POLLING_TIMEOUT,
+        handle_as_tasks=True,
+        handle_signals=True,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
 
 
 # ---------------------------
 # Main
 # ---------------------------
 
-async def main() -> None:
+async def main(settings: RunSettings) -> None:
     setup_logging()
-    settings = parse_args()
 
     bot = build_bot()
     dp = build_dispatcher()
+    h_search.warm_caches()
 
     try:
         if settings.mode == "polling":
@@ -198,11 +327,25 @@ async def main() -> None:
     except (KeyboardInterrupt, SystemExit):
         logging.info("Shutting down…")
     finally:
-        try:
-            await bot.session.close()
-        except Exception:
-            pass
+        for close in (bot.session.close, ittour.close_session):
+            try:
+                await close()
+            except Exception:
+                pass
+        state.close()  # дописати чергу state у SQLite (якщо STATE_DB задано)
+        stop_logging()
+
+
+def run() -> None:
+    settings = parse_args()
+    try:
+        import uvloop
+    except ImportError:
+        # uvloop недоступний (напр. Windows) — працюємо на стандартному циклі
+        asyncio.run(main(settings))
+    else:
+        uvloop.run(main(settings))
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run()
@@ -1,6 +1,15 @@
+import functools
+import json
 import os
+import unicodedata
+from types import MappingProxyType
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # orjson опційний — stdlib json як fallback
+    orjson = None
+
 load_dotenv()
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
@@ -15,12 +24,15 @@ CURRENCY_DEFAULT = int(os.getenv("CURRENCY_DEFAULT", "2"))  # 2=UAH
 WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
 WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
 
+# шлях до SQLite-файлу для state чатів (переживає рестарт); порожньо — лише в пам'яті
+STATE_DB = os.getenv("STATE_DB", "")
+
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 LOG_DIR = os.path.join(BASE_DIR, "logs")
-os.makedirs(LOG_DIR, exist_ok=True)
 LOG_FILE = os.path.join(LOG_DIR, "bot.log")
 
-DEFAULTS = {
+# незмінний: спільний для всіх запитів, випадковий запис має падати
+DEFAULTS = MappingProxyType({
     "type": 1,
     "kind": 1,
     "hotel_rating": 78,
@@ -28,12 +40,53 @@ DEFAULTS = {
     "child_amount": 0,
     "night_from": 6,
     "night_till": 8,
-    "currency": int(os.getenv("CURRENCY_DEFAULT", "2")),
+    "currency": CURRENCY_DEFAULT,
     "items_per_page": 10,
     "price_from": 100,
     "price_till": 500_000,
-}
+})
 
 DATA_DIR = os.path.join(BASE_DIR, "data")
 COUNTRY_MAP_FILE = os.path.join(DATA_DIR, "country_map.json")
 FROM_CITY_MAP_FILE = os.path.join(DATA_DIR, "from_city_map.json")
+
+
+def _load_json(path: str) -> dict:
+    with open(path, "rb") as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def _nfc_keys(mapping: dict) -> dict:
+    # ключі в NFC — як і текст користувача після _norm_text, щоб "й"/"ї" збігались точно
+    return {unicodedata.normalize("NFC", k): v for k, v in mapping.items()}
+
+
+@functools.lru_cache(maxsize=1)
+def country_map() -> dict:
+    """country_map.json, розібраний один раз на процес (спільний dict — не мутувати)."""
+    return _nfc_keys(_load_json(COUNTRY_MAP_FILE))
+
+
+@functools.lru_cache(maxsize=1)
+def from_city_map() -> dict:
+    """from_city_map.json, розібраний один раз на процес (спільний dict — не мутувати)."""
+    return _nfc_keys(_load_json(FROM_CITY_MAP_FILE))
+
+
+@functools.lru_cache(maxsize=1)
+def country_names() -> dict:
+    """Зворотна мапа id → назва країни (для зведення, коли назви в тексті немає)."""
+    names: dict = {}
+    for name, cid in country_map().items():
+        names.setdefault(cid, name)
+    return names
+
+
+@functools.lru_cache(maxsize=1)
+def from_city_names() -> dict:
+    """Зворотна мапа id → назва міста вильоту (для кнопок вибору міста)."""
+    names: dict = {}
+    for name, fid in from_city_map().items():
+        names.setdefault(fid, name)  # як і раніше: перша назва з таким id
+    return names
@@ -144,6 +144,11 @@ ERROR_TIPS: dict[int, str] = {
 
 _DEFAULT_MSG = "Помилка сервера або параметрів. Спробуйте змінити умови пошуку."
 
+_RE_FIELD = re.compile(r"Field\s+([a-zA-Z0-9_]+)")
+_RE_NUMS = re.compile(r"\d+")
+_RE_FORMAT = re.compile(r"format\s+([^\s]+)", re.IGNORECASE)
+_RE_DATE = re.compile(r"Date\s+([0-9.\-\/]+)")
+
 def _extract_params_from_desc(desc: str) -> dict[str, str]:
     """
     Витягує значення з рядків типу:
@@ -155,12 +160,12 @@ def _extract_params_from_desc(desc: str) -> dict[str, str]:
         return out
 
     # field
-    m = re.search(r"Field\s+([a-zA-Z0-9_]+)", desc)
+    m = _RE_FIELD.search(desc)
     if m:
         out["field"] = m.group(1)
 
     # numbers in text
-    nums = re.findall(r"\d+", desc)
+    nums = _RE_NUMS.findall(desc)
     if nums:
         # під різні шаблони
         if "number" not in out and len(nums) >= 1:
@@ -174,12 +179,12 @@ def _extract_params_from_desc(desc: str) -> dict[str, str]:
             out.setdefault("value", nums[0])
 
     # format in quotes or after word format
-    m = re.search(r"format\s+([^\s]+)", desc, flags=re.IGNORECASE)
+    m = _RE_FORMAT.search(desc)
     if m:
         out["format"] = m.group(1)
 
     # date
-    m = re.search(r"Date\s+([0-9.\-\/]+)", desc)
+    m = _RE_DATE.search(desc)
     if m:
         out["date"] = m.group(1)
 
@@ -192,8 +197,8 @@ def humanize_error(code: int, payload: Any = None) -> str:
     """
     msg_tpl = ERROR_TIPS.get(int(code or 0), _DEFAULT_MSG)
 
-    # Якщо немає payload — просто повертаємо шаблон
-    if payload is None:
+    # Якщо немає payload або в шаблоні нема плейсхолдерів — просто повертаємо шаблон
+    if payload is None or "{" not in msg_tpl:
         return msg_tpl
 
     # Спроба дістати error_desc (як у вашому прикладі)
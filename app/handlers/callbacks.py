@@ -1,18 +1,18 @@
-from aiogram import Router, F
+from aiogram import Router
+from aiogram.filters.callback_data import CallbackData
 from aiogram.types import CallbackQuery
 from app.state import set as state_set
 
 router = Router()
 
-@router.callback_query(F.data.startswith("from_city:"))
-async def choose_city(cb: CallbackQuery):
-    try:
-        _, fid = cb.data.split(":", 1)
-        fid = int(fid)
-    except Exception:
-        await cb.answer("Помилка міста")
-        return
 
-    state_set(cb.message.chat.id, from_city_id=fid)
+class FromCityCB(CallbackData, prefix="from_city"):
+    """Кнопка вибору міста вильоту: from_city:<id>."""
+    fid: int
+
+
+@router.callback_query(FromCityCB.filter())
+async def choose_city(cb: CallbackQuery, callback_data: FromCityCB):
+    state_set(cb.message.chat.id, from_city_id=callback_data.fid)
     await cb.message.answer("Дякую! Зберіг ваше місто вильоту. Тепер напишіть запит (країна/дати/бюджет).")
     await cb.answer()
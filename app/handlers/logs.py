@@ -1,15 +1,46 @@
+import asyncio
+import gzip
 import logging
+import os
+import shutil
+import tempfile
 from aiogram import Router
+from aiogram.filters import Command
 from aiogram.types import Message, FSInputFile
 from app.config import LOG_FILE
 
 router = Router()
-from aiogram.filters import Command
+
+
+def _gzip_log() -> str:
+    """
+    Стискає bot.log у тимчасовий .gz (текстові логи тиснуться в рази) і повертає шлях.
+    Блокуючий — викликати через asyncio.to_thread.
+    """
+    # спершу відкриваємо лог: якщо його немає — тимчасовий файл навіть не створюється
+    with open(LOG_FILE, "rb") as src:
+        tmp = tempfile.NamedTemporaryFile(prefix="bot-", suffix=".log.gz", delete=False)
+        try:
+            with tmp, gzip.open(tmp, "wb", compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst, length=1 << 20)
+        except BaseException:
+            os.remove(tmp.name)
+            raise
+    return tmp.name
+
 
 @router.message(Command("logs"))
 async def cmd_logs(message: Message):
+    gz_path = None
     try:
-        await message.answer_document(FSInputFile(LOG_FILE), caption="Логи бота")
+        gz_path = await asyncio.to_thread(_gzip_log)
+        await message.answer_document(FSInputFile(gz_path, filename="bot.log.gz"), caption="Логи бота")
     except Exception:
         logging.exception("Не вдалось відправити лог-файл")
         await message.answer("Не вдалось відправити лог-файл. Перевірте наявність ./logs/bot.log")
+    finally:
+        if gz_path:
+            try:
+                os.remove(gz_path)
+            except OSError:
+                pass
@@ -1,24 +1,27 @@
-import difflib
+import calendar
+import functools
 import hashlib
-import json
+import itertools
 import logging
-import os
 import re
+import unicodedata
 from datetime import datetime, timedelta
 from typing import Optional
 
 from aiogram import F, Router
 from aiogram.filters import CommandStart
-from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, InputMediaPhoto, Message
+from rapidfuzz import fuzz, process
 
 from app import config
-from app.config import DATA_DIR, DEFAULTS
+from app.config import DEFAULTS
 from app.errors import humanize_error
+from app.handlers.callbacks import FromCityCB
 from app.nlp.llm import llm_extract
 from app.nlp.parse import parse_user_text
 from app.render.cards import offers_to_messages
-from app.services.ittour import build_search_list_query, request_search_list
-from app.state import get as state_get, set as state_set
+from app.services.ittour import build_search_list_query, fmt_dmy, parse_dmy, request_search_list_async
+from app.state import get as state_get, update as state_update
 from app.state import reset as state_reset
 from app.validators import validate_required
 
@@ -35,52 +38,81 @@ _UA_MONTHS = {
     "липень": 7, "серпень": 8, "вересень": 9, "жовтень": 10, "листопад": 11, "грудень": 12,
 }
 
+# Перші 4 літери однозначно визначають місяць (обидві відмінкові форми дають той самий номер),
+# тож шукаємо за коротким ключем: "квіт" / "квітня" / "квітень" → 4.
+_UA_MONTHS_FAST = {k[:4]: v for k, v in _UA_MONTHS.items()}
+assert all(_UA_MONTHS_FAST[k[:4]] == v for k, v in _UA_MONTHS.items())
+
+# літери, з яких може складатися назва місяця (а-я + українські)
+_UA_WORD_CHARS = "".join(map(chr, range(ord("а"), ord("я") + 1))) + "іїєґ"
+_MONTH_DAYS = (0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# роздільники дати "," "/" "-" → "." одним проходом; пробіли (вже схлопнуті до " ") викидаємо
+_DATE_SEP_TRANS = str.maketrans({",": ".", "/": ".", "-": ".", " ": None})
+
+
+def _roll_year(dd: int, mm: int, now: datetime) -> int:
+    """
+    Рік для дати без року: поточний, або наступний, якщо дата вже минула.
+    Порівнюємо кортежі замість створення datetime; некоректний день/місяць — ValueError.
+    """
+    if not 1 <= mm <= 12:
+        raise ValueError("month must be in 1..12")
+    if not 1 <= dd <= _MONTH_DAYS[mm] or (mm == 2 and dd == 29 and not calendar.isleap(now.year)):
+        raise ValueError("day is out of range for month")
+    if (mm, dd) < (now.month, now.day):
+        return now.year + 1
+    return now.year
+
 
 def normalize_date_ddmmyy(date_str: str, now: datetime | None = None) -> str:
     if not date_str:
         raise ValueError("date_str is empty")
 
     now = now or datetime.now()
-    s = str(date_str).strip().lower()
-    s = re.sub(r"\s+", " ", s)
-
-    m = re.fullmatch(r"(\d{1,2})\s+([а-яіїєґ]+)(?:\s+(\d{2,4}))?", s)
-    if m:
-        dd = int(m.group(1))
-        mm = _UA_MONTHS.get(m.group(2))
+    s = " ".join(str(date_str).lower().split())
+
+    # вже нормалізована "DD.MM.YY" (так дата лежить у state) — повертаємо як є
+    if len(s) == 8 and s[2] == "." == s[5] and s.isascii() and (s[:2] + s[3:5] + s[6:]).isdigit():
+        return s
+
+    # dd.mm / dd.mm.yy / dd.mm.yyyy — найчастіший випадок, без regex: split + isdecimal
+    parts = s.translate(_DATE_SEP_TRANS).split(".")
+    n = len(parts)
+    if (
+        2 <= n <= 3
+        and 1 <= len(parts[0]) <= 2 and parts[0].isdecimal()
+        and 1 <= len(parts[1]) <= 2 and parts[1].isdecimal()
+        and (n == 2 or (len(parts[2]) in (2, 4) and parts[2].isdecimal()))
+    ):
+        dd, mm = int(parts[0]), int(parts[1])
+        if n == 2:
+            yyyy = _roll_year(dd, mm, now)
+            return f"{dd:02d}.{mm:02d}.{yyyy % 100:02d}"
+        return f"{dd:02d}.{mm:02d}.{int(parts[2]) % 100:02d}"
+
+    # "25 квітня" / "25 квітня 2026": токени замість regex
+    parts = s.split(" ")
+    n = len(parts)
+    if (
+        2 <= n <= 3
+        and 1 <= len(parts[0]) <= 2 and parts[0].isdecimal()
+        and parts[1] and not parts[1].strip(_UA_WORD_CHARS)
+        and (n == 2 or (2 <= len(parts[2]) <= 4 and parts[2].isdecimal()))
+    ):
+        dd = int(parts[0])
+        month_word = parts[1]
+        mm = _UA_MONTHS_FAST.get(month_word[:4]) if len(month_word) >= 4 else None
         if not mm:
-            raise ValueError(f"Unknown month name: {m.group(2)}")
+            raise ValueError(f"Unknown month name: {month_word}")
 
-        y_raw = m.group(3)
+        y_raw = parts[2] if n == 3 else None
         if y_raw:
             yyyy = int(y_raw)
             if yyyy < 100:
                 yyyy = 2000 + yyyy
         else:
-            yyyy = now.year
-            if datetime(yyyy, mm, dd).date() < now.date():
-                yyyy += 1
-        return f"{dd:02d}.{mm:02d}.{yyyy % 100:02d}"
-
-    s2 = s.replace(",", ".").replace("/", ".").replace("-", ".")
-    s2 = re.sub(r"\s+", "", s2)
-
-    m = re.fullmatch(r"(\d{1,2})\.(\d{1,2})", s2)
-    if m:
-        dd, mm = int(m.group(1)), int(m.group(2))
-        yyyy = now.year
-        if datetime(yyyy, mm, dd).date() < now.date():
-            yyyy += 1
-        return f"{dd:02d}.{mm:02d}.{yyyy % 100:02d}"
-
-    m = re.fullmatch(r"(\d{1,2})\.(\d{1,2})\.(\d{2})", s2)
-    if m:
-        dd, mm, yy = int(m.group(1)), int(m.group(2)), int(m.group(3))
-        return f"{dd:02d}.{mm:02d}.{yy:02d}"
-
-    m = re.fullmatch(r"(\d{1,2})\.(\d{1,2})\.(\d{4})", s2)
-    if m:
-        dd, mm, yyyy = int(m.group(1)), int(m.group(2)), int(m.group(3))
+            yyyy = _roll_year(dd, mm, now)
         return f"{dd:02d}.{mm:02d}.{yyyy % 100:02d}"
 
     raise ValueError(f"Unsupported date format: {date_str}")
@@ -90,72 +122,209 @@ def normalize_date_ddmmyy(date_str: str, now: datetime | None = None) -> str:
 # Fuzzy matching
 # ---------------------------
 
+# без IGNORECASE: рядок уже зведений casefold
+_RE_NORM_DROP = re.compile(r"[^\wа-яіїєґ'\- ]+")
+
+
+@functools.lru_cache(maxsize=4096)
 def _norm_text(s: str) -> str:
-    s = (s or "").strip().lower()
-    s = re.sub(r"[^\wа-яіїєґ'\- ]+", " ", s, flags=re.IGNORECASE)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    # casefold, а не lower: регістронезалежне порівняння для будь-якого алфавіту
+    if s and s.isalnum():
+        return s.casefold()  # одне слово ("Туреччина") — решту нормалізувати нічого
+    s = s or ""
+    if not unicodedata.is_normalized("NFC", s):
+        # розкладені "й"/"ї" (літера + комбінований знак) інакше розсипались би на пробіли
+        s = unicodedata.normalize("NFC", s)
+    s = _RE_NORM_DROP.sub(" ", s.casefold())
+    return " ".join(s.split())
 
 
-def fuzzy_lookup(name: Optional[str], mapping: dict, cutoff: float = 0.78) -> Optional[int]:
+# id(mapping) -> (mapping, {норм. ключ: ключ}); мапи живуть весь процес (config loaders)
+_NORM_INDEX: dict[int, tuple[dict, dict[str, str]]] = {}
+
+
+def _norm_index(mapping: dict) -> dict[str, str]:
+    cached = _NORM_INDEX.get(id(mapping))
+    if cached is not None and cached[0] is mapping:
+        return cached[1]
+    index = {_norm_text(k): k for k in mapping}
+    _NORM_INDEX[id(mapping)] = (mapping, index)
+    return index
+
+
+def fuzzy_lookup_key(name: Optional[str], mapping: dict, cutoff: float = 0.78) -> Optional[str]:
+    """Як fuzzy_lookup, але повертає знайдений ключ мапи (назву), а не id."""
     if not name:
         return None
     if name in mapping:
-        return mapping[name]
+        return name
 
-    keys = list(mapping.keys())
-    norm_to_key = {_norm_text(k): k for k in keys}
+    norm_to_key = _norm_index(mapping)
     n = _norm_text(name)
 
     if n in norm_to_key:
-        return mapping[norm_to_key[n]]
+        return norm_to_key[n]
+
+    # fuzz.ratio — та сама метрика 2*M/T, що й difflib, але в C++ і з відсіканням за score_cutoff
+    hit = process.extractOne(n, norm_to_key.keys(), scorer=fuzz.ratio, score_cutoff=cutoff * 100)
+    if hit:
+        return norm_to_key[hit[0]]
+    return None
 
-    candidates = difflib.get_close_matches(n, list(norm_to_key.keys()), n=1, cutoff=cutoff)
-    if candidates:
-        best_key = norm_to_key[candidates[0]]
-        return mapping.get(best_key)
+
+def fuzzy_lookup(name: Optional[str], mapping: dict, cutoff: float = 0.78) -> Optional[int]:
+    key = fuzzy_lookup_key(name, mapping, cutoff)
+    return mapping.get(key) if key is not None else None
+
+
+# id(mapping) -> (mapping, regex, ({основа назви: ключ} для кожної групи regex))
+_SCANNERS: dict[int, tuple[dict, re.Pattern, tuple[dict[str, str], ...]]] = {}
+
+_VOWELS = "аеєиіїоуюя"
+# закінчення відмінків після основи: "туреччин|у", "грузі|єю", "єгипт|ом"
+_END_REQ = f"(?:ь|[{_VOWELS}]{{1,2}}[мх]?)"
+_END_OPT = f"(?:[{_VOWELS}]{{1,2}}[мх]?)?"
+
+
+def _scan_forms(norm: str) -> list[tuple[str, str]]:
+    """
+    (основа, regex закінчення) для нормалізованої назви. Основа завжди збігається з назвою
+    щонайменше на len - 2 літери, тож "палацу" не стає "Палау", а "канал" — "Канадою".
+    """
+    if len(norm) <= 4:
+        return [(norm, "")]  # "сша", "куба", "іран" — лише точний збіг
+    soft = norm[-1] in _VOWELS or norm[-1] == "ь"
+    if len(norm) == 5:
+        # коротка назва: відкидаємо щонайбільше одну літеру і додаємо одну голосну
+        return [(norm[:-1], f"[{_VOWELS}]")] if soft else [(norm, f"[{_VOWELS}]?")]
+    if soft:
+        return [(norm[:-1], _END_REQ)]
+    forms = [(norm, _END_OPT)]
+    if norm[-2] in "ео":
+        forms.append((norm[:-2] + norm[-1], _END_REQ))  # випадний голосний: "єгипет" → "єгипту"
+    elif norm[-2] == "і":
+        # чергування і/о, і/е: "краків" → "кракова", "кишинів" → "кишинева"
+        forms += [(norm[:-2] + v + norm[-1], _END_REQ) for v in "ое"]
+    return forms
+
+
+def _scanner(mapping: dict) -> tuple[re.Pattern, tuple[dict[str, str], ...]]:
+    """
+    Одна regex-альтернація з усіх назв мапи (найдовші першими) — знаходить назву
+    в довільному тексті за один прохід, разом з відмінковими формами (_scan_forms).
+    """
+    cached = _SCANNERS.get(id(mapping))
+    if cached is not None and cached[0] is mapping:
+        return cached[1], cached[2]
+    by_end: dict[str, dict[str, str]] = {}
+    for norm, key in _norm_index(mapping).items():
+        for stem, end in _scan_forms(norm):
+            by_end.setdefault(end, {}).setdefault(stem, key)
+
+    alts = [
+        "(" + "|".join(re.escape(w) for w in sorted(stems, key=len, reverse=True)) + ")" + end
+        for end, stems in by_end.items()
+    ]
+    pattern = re.compile(rf"(?<!\w)(?:{'|'.join(alts)})(?!\w)")
+    groups = tuple(by_end.values())
+    _SCANNERS[id(mapping)] = (mapping, pattern, groups)
+    return pattern, groups
+
+
+def scan_lookup_key(text: Optional[str], mapping: dict) -> Optional[str]:
+    """
+    Ключ мапи (назва), що першим трапляється в тексті; fuzzy_lookup лишається для описок.
+
+    >>> m = {"Єгипет": 338, "Палау": 1, "Туреччина": 318, "Канада": 2}
+    >>> scan_lookup_key("Хочу в Єгипту", m), scan_lookup_key("в Туреччину на тиждень", m)
+    ('Єгипет', 'Туреччина')
+    >>> scan_lookup_key("біля палацу", m), scan_lookup_key("вздовж каналу", m)
+    (None, None)
+    """
+    if not text:
+        return None
+    pattern, groups = _scanner(mapping)
+    m = pattern.search(_norm_text(text))
+    if m:
+        return groups[m.lastindex - 1][m.group(m.lastindex)]
     return None
 
 
+def scan_lookup(text: Optional[str], mapping: dict) -> Optional[int]:
+    key = scan_lookup_key(text, mapping)
+    return mapping.get(key) if key is not None else None
+
+
 # ---------------------------
 # Helpers
 # ---------------------------
 
+# Клавіатури статичні (і незмінні після створення) — будуємо один раз.
+@functools.lru_cache(maxsize=1)
 def city_keyboard() -> InlineKeyboardMarkup:
-    with open(os.path.join(DATA_DIR, "from_city_map.json"), "r", encoding="utf-8") as f:
-        city_map = json.load(f)
+    city_map = config.from_city_map()
 
     btns: list[list[InlineKeyboardButton]] = []
     top = ["Кишинів", "Варшава", "Краків", "Ясси"]
     for name in top:
         fid = city_map.get(name)
         if fid:
-            btns.append([InlineKeyboardButton(text=name, callback_data=f"from_city:{fid}")])
+            btns.append([InlineKeyboardButton(text=name, callback_data=FromCityCB(fid=fid).pack())])
     return InlineKeyboardMarkup(inline_keyboard=btns)
 
 
+@functools.lru_cache(maxsize=1)
 def controls_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="🔄 Новий пошук", callback_data="search_reset")]
     ])
 
 
-def _set_draft(chat_id: int, **kwargs) -> None:
-    current = state_get(chat_id) or {}
-    merged = {**current, **kwargs}
-    state_set(chat_id, **merged)
+def warm_caches() -> None:
+    """
+    Розбирає мапи й будує похідні кеші (нормалізовані індекси, regex-сканери, клавіатуру)
+    під час старту — перше повідомлення не платить за них.
+    """
+    for mapping in (config.country_map(), config.from_city_map()):
+        _scanner(mapping)  # заодно будує _norm_index
+    city_keyboard()
+
+
+def _set_draft(chat_id: int, **kwargs) -> dict:
+    # доповнює наявний state на місці (без копії всього dict) і повертає його
+    return state_update(chat_id, **kwargs)
+
+
+# Поля draft, що беруться з першого непорожнього джерела (llm → rb → cached), інакше — default.
+_MERGED_FIELDS = {
+    "adults": DEFAULTS.get("adult_amount", 2),
+    "children": DEFAULTS.get("child_amount", 0),
+    "child_ages": None,
+    "date_from": None,
+    "date_till": None,
+    "currency_hint": None,
+    "budget_from": DEFAULTS.get("price_from"),
+    "budget_to": DEFAULTS.get("price_till"),
+}
+_ZERO_OK = frozenset({"children"})  # 0 — валідне значення (кількість дітей)
 
 
-def _pick(*vals, allow_zero: bool = False):
-    for v in vals:
-        if v is None:
-            continue
-        if v == "" or v == [] or v == {}:
-            continue
-        if v == 0 and not allow_zero:
-            continue
-        return v
-    return None
+def _merge_sources(sources: tuple[dict, ...]) -> dict:
+    """
+    Перше "непорожнє" значення для кожного поля (пропускає None, "", [], {}, 0 —
+    крім полів із _ZERO_OK), один прохід по полях.
+    """
+    out = {}
+    for key, default in _MERGED_FIELDS.items():
+        zero_ok = key in _ZERO_OK
+        for src in sources:
+            v = src.get(key)
+            if v or (zero_ok and v == 0):
+                break
+        else:
+            v = default if (default or (zero_ok and default == 0)) else None
+        out[key] = v
+    return out
 
 
 def _safe_int(v, default: int) -> int:
@@ -167,25 +336,50 @@ def _safe_int(v, default: int) -> int:
         return int(default)
 
 
+# Поля state, зміна яких означає новий пошук (порядок важливий для відбитка).
+_QUERY_FIELDS = (
+    "country_id",
+    "from_city_id",
+    "adults",
+    "children",
+    "date_from",
+    "date_till",
+    "budget_from",
+    "budget_to",
+    "currency_hint",
+)
+# Фіксовані параметри (DEFAULTS незмінний) — частина ключа, що не залежить від state.
+_QUERY_FIXED_SUFFIX = f"|{DEFAULTS['night_from']}|{DEFAULTS['night_till']}|{DEFAULTS['hotel_rating']}"
+
+_DEFAULT_ADULTS = int(DEFAULTS.get("adult_amount", 2))
+_DEFAULT_CHILDREN = int(DEFAULTS.get("child_amount", 0))
+
+# build_search_list_query з уже підставленими незмінними DEFAULTS
+_build_query = functools.partial(
+    build_search_list_query,
+    night_from=DEFAULTS["night_from"],
+    night_till=DEFAULTS["night_till"],
+    hotel_rating=DEFAULTS["hotel_rating"],
+    kind=DEFAULTS["kind"],
+    tour_type=DEFAULTS["type"],
+    items_per_page=DEFAULTS["items_per_page"],
+)
+
+
 def _make_query_hash(st: dict) -> str:
     """
     Хеш ключових параметрів. Якщо змінюється — це новий пошук.
     """
-    key = "|".join([
-        str(st.get("country_id") or ""),
-        str(st.get("from_city_id") or ""),
-        str(st.get("adults") or ""),
-        str(st.get("children") or ""),
-        str(st.get("date_from") or ""),
-        str(st.get("date_till") or ""),
-        str(st.get("budget_from") or ""),
-        str(st.get("budget_to") or ""),
-        str(st.get("currency_hint") or ""),
-        str(DEFAULTS.get("night_from")),
-        str(DEFAULTS.get("night_till")),
-        str(DEFAULTS.get("hotel_rating")),
-    ])
-    return hashlib.md5(key.encode("utf-8")).hexdigest()
+    key = "|".join([str(st.get(f) or "") for f in _QUERY_FIELDS]) + _QUERY_FIXED_SUFFIX
+    # не криптографічний відбиток: blake2b з 8-байтовим дайджестом швидший за md5 і коротший у state
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+
+
+# рядки зведення, що залежать лише від DEFAULTS, — форматуються один раз
+_SUMMARY_FIXED = (
+    f"🛌 {DEFAULTS.get('night_from')}–{DEFAULTS.get('night_till')} ноч.\n"
+    f"⭐ {DEFAULTS.get('hotel_rating')}\n"
+)
 
 
 def _build_summary(st: dict) -> str:
@@ -207,18 +401,48 @@ def _build_summary(st: dict) -> str:
         f"🌍 Країна: {st.get('country_name') or '—'}\n"
         f"{people}\n"
         f"📅 {st.get('date_from') or '—'} – {st.get('date_till') or '—'}\n"
-        f"🛌 {DEFAULTS.get('night_from')}–{DEFAULTS.get('night_till')} ноч.\n"
-        f"⭐ {DEFAULTS.get('hotel_rating')}\n"
+        f"{_SUMMARY_FIXED}"
         f"{budget}"
     )
 
 
+async def _send_offer(message: Message, caption: str, image_url: Optional[str]) -> None:
+    # фото з підписом; якщо Telegram не приймає картинку — тим самим текстом
+    if image_url:
+        try:
+            await message.answer_photo(photo=image_url, caption=caption)
+            return
+        except Exception:
+            pass
+    await message.answer(caption)
+
+
+MEDIA_GROUP_MAX = 10  # ліміт Telegram на один альбом
+
+
+async def _send_album(message: Message, items: list[tuple[str, str]]) -> None:
+    """
+    Суміжні (за рейтингом) картки з фото — одним sendMediaGroup замість запиту на кожну.
+    Кожне фото несе свій підпис: у відкритому альбомі його видно під своїм готелем.
+    """
+    if len(items) > 1:
+        try:
+            await message.answer_media_group([InputMediaPhoto(media=u, caption=c) for c, u in items])
+            return
+        except Exception:
+            # альбом відхиляється цілком (напр. одна недоступна картинка) — шлемо поштучно
+            pass
+    for c, u in items:
+        await _send_offer(message, c, u)
+
+
 async def _ask_missing(message: Message, st: dict) -> bool:
     if not st.get("country_id"):
         await message.answer(
             "Куди летимо? 🌍 Напишіть країну (наприклад: Єгипет / Туреччина).",
             reply_markup=controls_keyboard(),
         )
+        _set_draft(message.chat.id, awaiting="country_id")
         return True
 
     if not st.get("from_city_id"):
@@ -228,6 +452,7 @@ async def _ask_missing(message: Message, st: dict) -> bool:
 
     if st.get("adults") in (None, ""):
         await message.answer("Скільки дорослих? 👤 (наприклад: 2)", reply_markup=controls_keyboard())
+        _set_draft(message.chat.id, awaiting="adults")
         return True
 
     if st.get("children") in (None, ""):
@@ -238,15 +463,95 @@ async def _ask_missing(message: Message, st: dict) -> bool:
             "На яку дату виїзду? 🗓️ (10.12 / 25,4 / 25 квітня / 10.12.2026)",
             reply_markup=controls_keyboard(),
         )
+        _set_draft(message.chat.id, awaiting="date_from")
         return True
 
     if (st.get("budget_from") in (None, "")) and (st.get("budget_to") in (None, "")):
         await message.answer("Який бюджет? 💰 (1500$ або 70000 грн)", reply_markup=controls_keyboard())
+        _set_draft(message.chat.id, awaiting="budget")
         return True
 
     return False
 
 
+# Які ключі rule-based парсера закривають кожне поле, про яке питає _ask_missing.
+_RB_COVERS = {
+    "country_id": ("country_id", "country_name"),
+    "from_city_id": ("from_city_id", "from_city_name"),
+    "adults": ("adults",),
+    "date_from": ("date_from",),
+    "budget": ("budget_from", "budget_to"),
+}
+
+# Коротка відповідь з цифр/роздільників ("2", "10.12", "1500$") — LLM тут нічого не додасть.
+_RE_SHORT_REPLY = re.compile(r"[\d\s.,/\-$€₴]{1,12}")
+
+
+def _missing_fields(st: dict) -> list[str]:
+    """Поля, яких бракує для пошуку (у тому ж порядку, що й питання в _ask_missing)."""
+    missing = []
+    if not st.get("country_id"):
+        missing.append("country_id")
+    if not st.get("from_city_id"):
+        missing.append("from_city_id")
+    if st.get("adults") in (None, ""):
+        missing.append("adults")
+    if not st.get("date_from"):
+        missing.append("date_from")
+    if (st.get("budget_from") in (None, "")) and (st.get("budget_to") in (None, "")):
+        missing.append("budget")
+    return missing
+
+
+_RE_BARE_ADULTS = re.compile(r"\d{1,2}")
+_RE_BARE_BUDGET = re.compile(r"(\d{2,7})(?:\$|€|грн\.?|uah|usd|eur)?")
+
+
+def _trivial_answer(text: str, awaiting: Optional[str], country_map: dict) -> dict:
+    """
+    Коротка відповідь на останнє питання з _ask_missing ("2", "10.12", "70000 грн", "Єгипет")
+    → поля у форматі parse_user_text, без LLM.
+    """
+    t = text.strip().lower()
+    if awaiting == "adults":
+        if _RE_BARE_ADULTS.fullmatch(t):
+            return {"adults": int(t)}
+    elif awaiting == "date_from":
+        try:
+            return {"date_from": normalize_date_ddmmyy(t)}
+        except ValueError:
+            pass
+    elif awaiting == "budget":
+        m = _RE_BARE_BUDGET.fullmatch(t.replace(" ", ""))  # "70 000 грн"
+        if m:
+            return {"budget_to": int(m.group(1))}
+    elif awaiting == "country_id" and len(t.split()) <= 3:
+        key = fuzzy_lookup_key(t, country_map)
+        if key is not None and country_map.get(key):
+            return {"country_id": country_map[key], "country_name": key}
+    return {}
+
+
+def _needs_llm(user_text: str, rb: dict, cached: dict) -> bool:
+    """
+    LLM — найдорожчий крок обробки повідомлення. Пропускаємо його, якщо:
+      - LLM вимкнено;
+      - це коротка числова відповідь на уточнення;
+      - у тексті немає з чого щось витягти ("ок", "так", емодзі);
+      - rule-based парсер уже закрив усі поля, яких бракувало.
+    """
+    if not (config.ENABLE_LLM and config.OPENAI_API_KEY):
+        return False
+    if _RE_SHORT_REPLY.fullmatch(user_text):
+        return False
+    if len(user_text) < 4 or not any(c.isalpha() for c in user_text):
+        return False
+    missing = _missing_fields(cached)
+    if missing and all(any(rb.get(k) is not None for k in _RB_COVERS[f]) for f in missing):
+        return False
+    return True
+
+
 def _extract_error_code(data: dict) -> int:
     code = data.get("error_code") or data.get("code")
     err = data.get("error")
@@ -283,13 +588,12 @@ async def _run_search(message: Message, st: dict) -> None:
         date_till = ""
 
     if not date_from:
-        date_from = (now + timedelta(days=2)).strftime("%d.%m.%y")
+        date_from = fmt_dmy(now + timedelta(days=2))
     if not date_till:
-        df = datetime.strptime(date_from, "%d.%m.%y")
-        date_till = (df + timedelta(days=12)).strftime("%d.%m.%y")
+        date_till = fmt_dmy(parse_dmy(date_from) + timedelta(days=12))
 
-    adults_i = _safe_int(st.get("adults"), int(DEFAULTS.get("adult_amount", 2)))
-    children_i = _safe_int(st.get("children"), int(DEFAULTS.get("child_amount", 0)))
+    adults_i = _safe_int(st.get("adults"), _DEFAULT_ADULTS)
+    children_i = _safe_int(st.get("children"), _DEFAULT_CHILDREN)
 
     if adults_i < 1 or adults_i > 4:
         await message.answer(
@@ -298,7 +602,7 @@ async def _run_search(message: Message, st: dict) -> None:
         )
         return
 
-    _set_draft(
+    st = _set_draft(
         message.chat.id,
         date_from=date_from,
         date_till=date_till,
@@ -308,23 +612,17 @@ async def _run_search(message: Message, st: dict) -> None:
     )
 
     try:
-        url, params = build_search_list_query(
+        url, params = _build_query(
             country_id=st.get("country_id"),
             from_city_id=st.get("from_city_id"),
             adults=adults_i,
             children=children_i,
             child_ages=st.get("child_ages"),
-            night_from=DEFAULTS["night_from"],
-            night_till=DEFAULTS["night_till"],
-            hotel_rating=DEFAULTS["hotel_rating"],
             date_from_str=date_from,
             date_till_str=date_till,
-            kind=DEFAULTS["kind"],
-            tour_type=DEFAULTS["type"],
             currency_hint=st.get("currency_hint"),
             budget_to=st.get("budget_to"),
             budget_from=st.get("budget_from"),
-            items_per_page=DEFAULTS["items_per_page"],
         )
         logging.info("ITTour request url=%s params=%s", url, params)
     except Exception as e:
@@ -332,16 +630,8 @@ async def _run_search(message: Message, st: dict) -> None:
         await message.answer(f"Помилка параметрів: {e}")
         return
 
-    missing = validate_required({
-        "country": params.get("country"),
-        "from_city": params.get("from_city"),
-        "hotel_rating": params.get("hotel_rating"),
-        "adult_amount": params.get("adult_amount"),
-        "night_from": params.get("night_from"),
-        "night_till": params.get("night_till"),
-        "date_from": params.get("date_from"),
-        "date_till": params.get("date_till"),
-    })
+    # validate_required читає лише REQUIRED_FIELDS — окрема копія params не потрібна
+    missing = validate_required(params)
     if missing:
         if missing == "from_city":
             await message.answer("Потрібне місто вильоту ✈️ Оберіть зі списку:", reply_markup=city_keyboard())
@@ -354,7 +644,7 @@ async def _run_search(message: Message, st: dict) -> None:
         return
 
     try:
-        data = request_search_list(params)
+        data = await request_search_list_async(params)
     except Exception:
         await message.answer("Сервіс тимчасово недоступний. Спробуйте пізніше.")
         return
@@ -369,7 +659,7 @@ async def _run_search(message: Message, st: dict) -> None:
         await message.answer(f"Сталася помилка ITTour ({code_int}). {tip}")
         return
 
-    await message.answer(_build_summary(state_get(message.chat.id) or {}), reply_markup=controls_keyboard())
+    await message.answer(_build_summary(st), reply_markup=controls_keyboard())
 
     currency_id = int(params.get("currency", config.CURRENCY_DEFAULT))
     offers = offers_to_messages(data, currency_id=currency_id)
@@ -380,14 +670,16 @@ async def _run_search(message: Message, st: dict) -> None:
         )
         return
 
-    for caption, image_url in offers:
-        if image_url:
-            try:
-                await message.answer_photo(photo=image_url, caption=caption)
-                continue
-            except Exception:
-                pass
-        await message.answer(caption)
+    # картки впорядковані за ціною — шлемо послідовно, щоб Telegram показав їх у тому ж порядку;
+    # альбомом ідуть лише суміжні картки з фото, картка без фото розриває альбом
+    for has_photo, run in itertools.groupby(offers, key=lambda o: bool(o[1])):
+        run = list(run)
+        if has_photo:
+            for i in range(0, len(run), MEDIA_GROUP_MAX):
+                await _send_album(message, run[i:i + MEDIA_GROUP_MAX])
+        else:
+            for c, _ in run:
+                await _send_offer(message, c, None)
 
     if data.get("has_more_pages"):
         page = data.get("page", 1)
@@ -428,27 +720,16 @@ async def cb_search_start(cb: CallbackQuery) -> None:
     await cb.answer()
 
 
-@router.callback_query(F.data.startswith("from_city:"))
-async def cb_from_city(cb: CallbackQuery) -> None:
-    try:
-        fid = int(cb.data.split(":", 1)[1])
-    except Exception:
-        await cb.answer("Некоректні дані міста", show_alert=True)
-        return
+@router.callback_query(FromCityCB.filter())
+async def cb_from_city(cb: CallbackQuery, callback_data: FromCityCB) -> None:
+    fid = callback_data.fid
 
-    with open(os.path.join(DATA_DIR, "from_city_map.json"), "r", encoding="utf-8") as f:
-        city_map = json.load(f)
-    from_city_name = None
-    for k, v in city_map.items():
-        if v == fid:
-            from_city_name = k
-            break
+    from_city_name = config.from_city_names().get(fid)
 
-    _set_draft(cb.message.chat.id, from_city_id=fid, from_city_name=from_city_name, awaiting_from_city=False)
+    st2 = _set_draft(cb.message.chat.id, from_city_id=fid, from_city_name=from_city_name, awaiting_from_city=False)
     await cb.message.answer("Дякую! ✅ Зберіг місто вильоту. Перевіряю ваш запит…")
     await cb.answer()
 
-    st2 = state_get(cb.message.chat.id) or {}
     asked = await _ask_missing(cb.message, st2)
     if asked:
         return
@@ -460,13 +741,25 @@ async def handle_text(message: Message) -> None:
     user_text = (message.text or "").strip()
     cached = state_get(message.chat.id) or {}
 
-    with open(os.path.join(DATA_DIR, "country_map.json"), "r", encoding="utf-8") as f:
-        country_map = json.load(f)
-    with open(os.path.join(DATA_DIR, "from_city_map.json"), "r", encoding="utf-8") as f:
-        city_map = json.load(f)
+    country_map = config.country_map()
+    city_map = config.from_city_map()
 
-    llm = llm_extract(user_text, country_map, city_map)
     rb = parse_user_text(user_text)
+    # країну regex-парсер не шукає, а місто бере разом з рештою фрази — знаходимо назви з мап
+    if not rb.get("country_id"):
+        key = scan_lookup_key(user_text, country_map)
+        if key is not None and country_map.get(key):
+            # назву беремо з мапи разом з id — інакше в зведенні лишилась би стара країна
+            rb["country_id"] = country_map[key]
+            rb["country_name"] = rb.get("country_name") or key
+    if rb.get("from_city_name") and not rb.get("from_city_id"):
+        rb["from_city_id"] = scan_lookup(rb["from_city_name"], city_map)
+    for k, v in _trivial_answer(user_text, cached.get("awaiting"), country_map).items():
+        if rb.get(k) is None:
+            rb[k] = v
+    llm: dict = {}
+    if _needs_llm(user_text, rb, cached):
+        llm = await llm_extract(user_text, country_map, city_map)
 
     user_set_any = any([
         rb.get("country_name") or llm.get("country_name") or rb.get("country_id") or llm.get("country_id"),
@@ -493,37 +786,27 @@ async def handle_text(message: Message) -> None:
         or rb.get("from_city_name")
     )
 
-    country_id = _pick(
-        llm.get("country_id"),
-        rb.get("country_id"),
-        fuzzy_lookup(llm.get("country_name"), country_map),
-        fuzzy_lookup(rb.get("country_name"), country_map),
-        None if explicit_country else cached.get("country_id"),
-    )
-
-    from_city_id = _pick(
-        llm.get("from_city_id"),
-        rb.get("from_city_id"),
-        fuzzy_lookup(llm.get("from_city_name"), city_map),
-        fuzzy_lookup(rb.get("from_city_name"), city_map),
-        None if explicit_from_city else cached.get("from_city_id"),
+    # ланцюжок `or`: fuzzy_lookup виконується лише коли готового id немає
+    country_id = (
+        llm.get("country_id")
+        or rb.get("country_id")
+        or fuzzy_lookup(llm.get("country_name"), country_map)
+        or fuzzy_lookup(rb.get("country_name"), country_map)
+        or (None if explicit_country else cached.get("country_id"))
+        or None
     )
 
-    adults = _pick(llm.get("adults"), rb.get("adults"), cached.get("adults"), DEFAULTS.get("adult_amount", 2))
-    children = _pick(
-        llm.get("children"),
-        rb.get("children"),
-        cached.get("children"),
-        DEFAULTS.get("child_amount", 0),
-        allow_zero=True,
+    from_city_id = (
+        llm.get("from_city_id")
+        or rb.get("from_city_id")
+        or fuzzy_lookup(llm.get("from_city_name"), city_map)
+        or fuzzy_lookup(rb.get("from_city_name"), city_map)
+        or (None if explicit_from_city else cached.get("from_city_id"))
+        or None
     )
 
-    child_ages = _pick(llm.get("child_ages"), rb.get("child_ages"), cached.get("child_ages"))
-    date_from = _pick(llm.get("date_from"), rb.get("date_from"), cached.get("date_from"))
-    date_till = _pick(llm.get("date_till"), rb.get("date_till"), cached.get("date_till"))
-    currency_hint = _pick(llm.get("currency_hint"), rb.get("currency_hint"), cached.get("currency_hint"))
-    budget_from = _pick(llm.get("budget_from"), rb.get("budget_from"), cached.get("budget_from"), DEFAULTS.get("price_from"))
-    budget_to = _pick(llm.get("budget_to"), rb.get("budget_to"), cached.get("budget_to"), DEFAULTS.get("price_till"))
+    merged = _merge_sources((llm, rb, cached))
+    date_from, date_till = merged["date_from"], merged["date_till"]
 
     now = datetime.now()
     if date_from:
@@ -539,35 +822,32 @@ async def handle_text(message: Message) -> None:
             await message.answer("Не можу розпізнати дату 'до' 🗓️ Напишіть: 10.12 / 25,4 / 25 квітня / 10.12.2026")
             return
 
-    country_name = cached.get("country_name")
-    if rb.get("country_name"):
-        country_name = rb.get("country_name")
-    if llm.get("country_name"):
-        country_name = llm.get("country_name")
+    # назва з кешу годиться лише для тієї ж країни: змінився id — стара назва відкидається
+    country_name = (
+        llm.get("country_name")
+        or rb.get("country_name")
+        or (cached.get("country_name") if country_id == cached.get("country_id") else None)
+        or config.country_names().get(country_id)
+    )
 
-    _set_draft(
-        message.chat.id,
+    merged["date_from"], merged["date_till"] = date_from, date_till
+    draft = dict(
+        merged,
         country_id=country_id,
         from_city_id=from_city_id,
-        adults=adults,
-        children=children,
-        child_ages=child_ages,
-        date_from=date_from,
-        date_till=date_till,
-        currency_hint=currency_hint,
-        budget_from=budget_from,
-        budget_to=budget_to,
         country_name=country_name,
         last_user_text=user_text,
+        awaiting=None,  # _ask_missing виставить заново, якщо ще чогось бракує
     )
 
-    st = state_get(message.chat.id) or {}
-
-    new_hash = _make_query_hash(st)
-    old_hash = st.get("query_hash")
+    # хеш і сторінку рахуємо до запису — state оновлюється один раз
+    new_hash = _make_query_hash({**cached, **draft})
+    old_hash = cached.get("query_hash")
     if user_set_any and old_hash and new_hash != old_hash:
-        _set_draft(message.chat.id, page=1)
-    _set_draft(message.chat.id, query_hash=new_hash)
+        draft["page"] = 1
+    draft["query_hash"] = new_hash
+
+    st = _set_draft(message.chat.id, **draft)
 
     asked = await _ask_missing(message, st)
     if asked:
@@ -1,14 +1,24 @@
 from __future__ import annotations
 import json
-from typing import Dict, Any
-from openai import OpenAI
+from collections import OrderedDict
+from typing import Dict, Any, Tuple
 from app.config import OPENAI_API_KEY, ENABLE_LLM, OPENAI_MODEL
 
 _CLIENT = None
+
+# Верхня межа очікування LLM: без повторів, щоб повільна відповідь не тримала чат довше.
+LLM_TIMEOUT = 10.0  # секунд
+
+# Кеш відповідей LLM на однакові тексти (мапи незмінні впродовж процесу).
+_CACHE_MAX = 512
+_CACHE: "OrderedDict[Tuple[str, int, int], Dict[str, Any]]" = OrderedDict()
+
 def _client():
     global _CLIENT
     if _CLIENT is None:
-        _CLIENT = OpenAI(api_key=OPENAI_API_KEY or None)
+        # openai (httpx, pydantic) імпортуємо лише при першому виклику LLM — швидший старт без LLM
+        from openai import AsyncOpenAI
+        _CLIENT = AsyncOpenAI(api_key=OPENAI_API_KEY or None, timeout=LLM_TIMEOUT, max_retries=0)
     return _CLIENT
 
 SYSTEM_PROMPT = """Ти — екстрактор параметрів для пошуку турів.
@@ -37,20 +47,44 @@ SYSTEM_PROMPT = """Ти — екстрактор параметрів для п
 - Якщо не впевнений — поверни null (не вигадуй).
 """
 
-def llm_extract(user_text: str, country_map: Dict[str,int], from_city_map: Dict[str,int]) -> Dict[str, Any]:
+# (id(country_map), id(from_city_map)) -> system prompt з уже серіалізованими мапами
+_PROMPTS: Dict[Tuple[int, int], str] = {}
+
+def _system_prompt(country_map: Dict[str,int], from_city_map: Dict[str,int]) -> str:
+    """
+    Мапи статичні — серіалізуємо їх один раз і тримаємо в system prompt:
+    незмінний префікс запиту OpenAI кешує, а user-повідомлення містить лише текст.
+    """
+    key = (id(country_map), id(from_city_map))
+    prompt = _PROMPTS.get(key)
+    if prompt is None:
+        maps = json.dumps(
+            {"country_map": country_map, "from_city_map": from_city_map},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        prompt = _PROMPTS[key] = f"{SYSTEM_PROMPT}\nMAPS:\n{maps}"
+    return prompt
+
+async def llm_extract(user_text: str, country_map: Dict[str,int], from_city_map: Dict[str,int]) -> Dict[str, Any]:
     if not ENABLE_LLM or not OPENAI_API_KEY:
         return {}
+    cache_key = (user_text, id(country_map), id(from_city_map))
+    hit = _CACHE.get(cache_key)
+    if hit is not None:
+        _CACHE.move_to_end(cache_key)
+        return dict(hit)
     cl = _client()
-    tool_context = {"country_map": country_map, "from_city_map": from_city_map}
     messages = [
-        {"role":"system","content": SYSTEM_PROMPT},
-        {"role":"user","content": f"TEXT:\n{user_text}\n\nMAPS:\n{json.dumps(tool_context, ensure_ascii=False)}"}
+        {"role":"system","content": _system_prompt(country_map, from_city_map)},
+        {"role":"user","content": f"TEXT:\n{user_text}"}
     ]
     try:
-        resp = cl.chat.completions.create(
+        resp = await cl.chat.completions.create(
             model=OPENAI_MODEL,
             messages=messages,
             temperature=0,
+            seed=0,
             response_format={"type":"json_object"}
         )
         raw = (resp.choices[0].message.content or "{}").strip()
@@ -63,6 +97,10 @@ def llm_extract(user_text: str, country_map: Dict[str,int], from_city_map: Dict[
                     data[k] = int(data[k])
                 except Exception:
                     data[k] = None
-        return data
+        if data:
+            _CACHE[cache_key] = data
+            if len(_CACHE) > _CACHE_MAX:
+                _CACHE.popitem(last=False)
+        return dict(data)
     except Exception:
         return {}
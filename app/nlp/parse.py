@@ -7,6 +7,20 @@ EUR_HINTS = ("eur", "євро", "€")
 # ключові слова для дорослих/людей (щоб "на 25.06" не стало adults=25)
 ADULT_WORDS = r"(доросл|людин|осіб|чол|персон|people|adults?)"
 
+_RE_CITY = re.compile(r"(?:з|із)\s+([\w'’\-\s]+)")
+_RE_ADULTS = re.compile(rf"(\d{{1,2}})\s*{ADULT_WORDS}\b")
+_RE_ADULTS_PREP = re.compile(rf"(?:на|для)\s*(\d{{1,2}})\s*{ADULT_WORDS}\b")
+_RE_CHILDREN = re.compile(r"(\d{1,2})\s*(?:дит|діт)")
+_RE_BUDGET_RANGE = re.compile(r"від\s*(\d+)\s*до\s*(\d+)")
+_RE_BUDGET_UP = re.compile(r"до\s*(\d+)")
+_RE_BUDGET_APPROX = re.compile(r"близько\s*(\d+)")
+# валюта одним проходом: група 1 — usd, група 2 — eur
+_RE_USD = re.compile("|".join(map(re.escape, USD_HINTS)))
+_RE_CURRENCY = re.compile(
+    f"({'|'.join(map(re.escape, USD_HINTS))})|({'|'.join(map(re.escape, EUR_HINTS))})"
+)
+_RE_DATE = re.compile(r"(\d{1,2})[.](\d{1,2})(?:[.](\d{2,4}))?")
+
 def parse_user_text(text: str) -> dict:
     t = (text or "").lower()
 
@@ -26,15 +40,15 @@ def parse_user_text(text: str) -> dict:
     }
 
     # місто вильоту: "з варшави", "із кишинева"
-    m_city = re.search(r"(?:з|із)\s+([\w'’\-\s]+)", t)
+    m_city = _RE_CITY.search(t)
     if m_city:
         out["from_city_name"] = m_city.group(1).strip()
 
     # дорослі: тільки якщо є ключове слово
     # "2 дорослих", "на 2 людини", "для 3 осіб"
-    m_ad = re.search(rf"(\d{{1,2}})\s*{ADULT_WORDS}\b", t)
+    m_ad = _RE_ADULTS.search(t)
     if not m_ad:
-        m_ad = re.search(rf"(?:на|для)\s*(\d{{1,2}})\s*{ADULT_WORDS}\b", t)
+        m_ad = _RE_ADULTS_PREP.search(t)
     if m_ad:
         try:
             out["adults"] = int(m_ad.group(1))
@@ -42,7 +56,7 @@ def parse_user_text(text: str) -> dict:
             pass
 
     # діти (опційно)
-    m_ch = re.search(r"(\d{1,2})\s*(?:дит|діт)", t)
+    m_ch = _RE_CHILDREN.search(t)
     if m_ch:
         try:
             out["children"] = int(m_ch.group(1))
@@ -50,31 +64,34 @@ def parse_user_text(text: str) -> dict:
             pass
 
     # бюджет: "від 50000 до 80000", "до 70000", "близько 1500"
-    rng = re.search(r"від\s*(\d+)\s*до\s*(\d+)", t)
+    rng = _RE_BUDGET_RANGE.search(t)
     if rng:
         out["budget_from"] = int(rng.group(1))
         out["budget_to"] = int(rng.group(2))
     else:
-        up = re.search(r"до\s*(\d+)", t)
+        up = _RE_BUDGET_UP.search(t)
         if up:
             out["budget_to"] = int(up.group(1))
-        approx = re.search(r"близько\s*(\d+)", t)
+        approx = _RE_BUDGET_APPROX.search(t)
         if approx and not out["budget_to"]:
             v = int(approx.group(1))
             out["budget_from"], out["budget_to"] = max(0, v - 200), v + 200
 
     # валюта
-    if any(h in t for h in USD_HINTS):
-        out["currency_hint"] = "usd"
-    elif any(h in t for h in EUR_HINTS):
-        out["currency_hint"] = "eur"
+    m_cur = _RE_CURRENCY.search(t)
+    if m_cur:
+        # usd має пріоритет, навіть якщо eur трапився в тексті раніше
+        if m_cur.group(1) or _RE_USD.search(t, m_cur.end()):
+            out["currency_hint"] = "usd"
+        else:
+            out["currency_hint"] = "eur"
 
     # дата: перша знайдена дата (dd.mm або dd.mm.yy)
-    m = re.search(r"(\d{1,2})[.](\d{1,2})(?:[.](\d{2,4}))?", t)
+    m = _RE_DATE.search(t)
     if m:
         d, mth, yy_raw = int(m.group(1)), int(m.group(2)), m.group(3)
         if yy_raw is None:
-            yy = int(datetime.now().strftime("%y"))
+            yy = datetime.now().year % 100  # те саме, що strftime("%y"), без форматування
         else:
             yy_i = int(yy_raw)
             if yy_i >= 100:
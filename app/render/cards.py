@@ -1,7 +1,10 @@
 from __future__ import annotations
-from typing import Any, Dict, Tuple, Optional, List, DefaultDict
+from typing import Any, Dict, Tuple, Optional, List
 from datetime import datetime
-from collections import defaultdict
+import heapq
+import sys
+from functools import lru_cache
+from operator import itemgetter
 
 CURRENCY_SIGN = {1: "$", 2: "₴", 10: "€"}
 
@@ -17,39 +20,82 @@ def _starize(hotel_rating: Optional[str]) -> str:
         return "—"
 
 
-def _fmt_date(api_date: Optional[str]) -> str:
-    if not api_date:
-        return "—"
+def _parse_api_date(api_date: str) -> datetime:
+    # "YYYY-MM-DD" від ITTour розбираємо зрізами; решту форм — strptime (та сама семантика)
+    if len(api_date) == 10 and api_date[4] == "-" == api_date[7]:
+        y, m, d = api_date[0:4], api_date[5:7], api_date[8:10]
+        if y.isdigit() and m.isdigit() and d.isdigit() and y[0] != "0":
+            return datetime(int(y), int(m), int(d))
+    return datetime.strptime(api_date, "%Y-%m-%d")
+
+
+# Дати в пропозиціях сильно повторюються — розбір/форматування кешуємо за рядком.
+@lru_cache(maxsize=2048)
+def _fmt_api_date(api_date: str) -> str:
     try:
-        dt = datetime.strptime(api_date, "%Y-%m-%d")
-        return dt.strftime("%d.%m.%Y")
+        dt = _parse_api_date(api_date)
     except Exception:
         return api_date
+    return f"{dt.day:02d}.{dt.month:02d}.{dt.year:04d}" if dt.year >= 1000 else dt.strftime("%d.%m.%Y")
 
 
-def _date_sort_key(api_date: Optional[str]) -> Tuple[int, Any]:
-    if not api_date:
-        return (1, "")
+@lru_cache(maxsize=2048)
+def _api_date_sort_key(api_date: str) -> Tuple[int, Any]:
     try:
-        return (0, datetime.strptime(api_date, "%Y-%m-%d"))
+        return (0, _parse_api_date(api_date))
     except Exception:
-        return (1, str(api_date))
+        return (1, api_date)
+
+
+def _fmt_date(api_date: Optional[str]) -> str:
+    if not api_date:
+        return "—"
+    if not isinstance(api_date, str):
+        return api_date  # не рядок — strptime однаково б не розібрав
+    return _fmt_api_date(api_date)
 
 
-def _pick_price(prices: Dict[str, Any] | None, currency_id: int) -> Tuple[Optional[float], str]:
-    if not prices or not isinstance(prices, dict):
+def _date_sort_key(api_date: Optional[str]) -> Tuple[int, Any]:
+    if not api_date:
+        return (1, "")
+    if not isinstance(api_date, str):
+        return (1, str(api_date))
+    return _api_date_sort_key(api_date)
+
+
+_NUM_TYPES = (int, float)
+
+
+def _price_picker(currency_id: int):
+    """
+    Вибір ціни (значення, знак валюти) з уже прив'язаною валютою: ключі та знак
+    рахуються один раз на виклик offers_to_messages, а не для кожної пропозиції.
+    """
+    cid_str = str(currency_id)
+    direct_sign = CURRENCY_SIGN.get(currency_id, "")
+
+    def pick(prices: Dict[str, Any] | None) -> Tuple[Optional[float], str]:
+        if not prices or not isinstance(prices, dict):
+            return None, ""
+        # is None, а не or: нульова ціна в потрібній валюті — теж ціна в цій валюті
+        direct = prices.get(currency_id)
+        if direct is None:
+            direct = prices.get(cid_str)
+        if isinstance(direct, (int, float)):
+            return float(direct), direct_sign
+        for k, v in prices.items():
+            # типовий запис {"2": 41250} — без try/except на кожній ітерації
+            if type(v) in _NUM_TYPES and (type(k) is int or (type(k) is str and k.isdecimal())):
+                return float(v), CURRENCY_SIGN.get(int(k), "")
+            try:
+                val = float(v)
+                k_int = int(k)
+                return val, CURRENCY_SIGN.get(k_int, "")
+            except Exception:
+                continue
         return None, ""
-    direct = prices.get(currency_id) or prices.get(str(currency_id))
-    if isinstance(direct, (int, float)):
-        return float(direct), CURRENCY_SIGN.get(currency_id, "")
-    for k, v in prices.items():
-        try:
-            val = float(v)
-            k_int = int(k)
-            return val, CURRENCY_SIGN.get(k_int, "")
-        except Exception:
-            continue
-    return None, ""
+
+    return pick
 
 
 def _short(text: Any, limit: int = 80) -> str:
@@ -58,9 +104,14 @@ def _short(text: Any, limit: int = 80) -> str:
 
 
 def _safe_int(v: Any, default: int = 0) -> int:
+    # часті випадки (None, int, рядок із цифр) — без try/except
+    if v is None:
+        return default
+    if type(v) is int:
+        return v
+    if type(v) is str and v.isdecimal():
+        return int(v)
     try:
-        if v is None:
-            return default
         return int(v)
     except Exception:
         return default
@@ -86,18 +137,39 @@ def _offer_key(o: Dict[str, Any]) -> Tuple:
     )
 
 
+def _norm_key(s: Optional[str]) -> str:
+    # casefold коректно зводить і кирилицю; intern — однакові назви стають одним об'єктом
+    return sys.intern(s.strip().casefold()) if s else ""
+
+
 def _hotel_group_key(o: Dict[str, Any]) -> Tuple:
     hid = o.get("hotel_id")
     if hid is not None:
         return ("hotel_id", str(hid))
-    hotel = (o.get("hotel") or o.get("name") or "").strip().lower()
-    region = (o.get("region") or "").strip().lower()
-    country = (o.get("country") or "").strip().lower()
+    hotel = _norm_key(o.get("hotel") or o.get("name"))
+    region = _norm_key(o.get("region"))
+    country = _norm_key(o.get("country"))
     stars = str(o.get("hotel_rating") or "")
     return ("fallback", hotel, region, country, stars)
 
 
-def build_offer_caption(o: Dict[str, Any], currency_id: int, *, include_people: bool = True) -> Tuple[str, Optional[str]]:
+_THOUSANDS_TRANS = str.maketrans(",", " ")  # 1,234,567 → 1 234 567
+
+
+def _fmt_price(price_val: Optional[float], sign: str) -> str:
+    if price_val is None:
+        return "—"
+    return f"{format(int(price_val), ',').translate(_THOUSANDS_TRANS)} {sign}"
+
+
+def build_offer_caption(
+    o: Dict[str, Any],
+    currency_id: int,
+    *,
+    include_people: bool = True,
+    price: Optional[Tuple[Optional[float], str]] = None,
+) -> Tuple[str, Optional[str]]:
+    """price — уже пораховане _price_picker для цієї пропозиції (щоб не рахувати вдруге)."""
     hotel = o.get("hotel") or o.get("name") or "Готель"
     stars = _starize(o.get("hotel_rating"))
     region = o.get("region") or "—"
@@ -111,9 +183,9 @@ def build_offer_caption(o: Dict[str, Any], currency_id: int, *, include_people:
     if include_people:
         people = _fmt_people(o.get("adult_amount"), o.get("child_amount"))
 
-    prices = o.get("prices") or {}
-    price_val, sign = _pick_price(prices, currency_id)
-    price_str = f"{int(price_val):,}".replace(",", " ") + f" {sign}" if price_val is not None else "—"
+    if price is None:
+        price = _price_picker(currency_id)(o.get("prices") or {})
+    price_str = _fmt_price(*price)
 
     image_url = None
     imgs = o.get("hotel_images") or []
@@ -133,103 +205,79 @@ def build_offer_caption(o: Dict[str, Any], currency_id: int, *, include_people:
     return caption, image_url
 
 
+_NO_PRICE = 10**18  # пропозиції без ціни — в кінець
+
+
+def _nights_sort(nights: Any) -> int:
+    try:
+        return int(nights or 0)
+    except Exception:
+        return 0
+
+
 def offers_to_messages(data: Dict[str, Any], currency_id: int = 2) -> List[Tuple[str, Optional[str]]]:
     offers: List[Dict[str, Any]] = (data or {}).get("offers") or []
     if not isinstance(offers, list) or not offers:
         return []
 
-    grouped: DefaultDict[Tuple, List[Dict[str, Any]]] = defaultdict(list)
+    # Один прохід: групування за готелем, відсів повних дублікатів і найнижча ціна
+    # на кожну пару (date_from, nights). Ціну кожної пропозиції рахуємо один раз:
+    # (число для порівнянь, (значення, знак), пропозиція, ночі як в API).
+    pick_price = _price_picker(currency_id)
+    groups: Dict[Tuple, Tuple[set, Dict[Tuple[str, str], Tuple[float, Tuple[Optional[float], str], Dict[str, Any], Any]]]] = {}
     for o in offers:
-        if isinstance(o, dict):
-            grouped[_hotel_group_key(o)].append(o)
-
-    messages: List[Tuple[str, Optional[str]]] = []
-
-    for group in grouped.values():
-        # 1) прибираємо повні дублікати
-        uniq: List[Dict[str, Any]] = []
-        seen = set()
-        for o in group:
-            k = _offer_key(o)
-            if k in seen:
-                continue
-            seen.add(k)
-            uniq.append(o)
-
-        if not uniq:
+        if not isinstance(o, dict):
             continue
+        gk = _hotel_group_key(o)
+        group = groups.get(gk)
+        if group is None:
+            group = groups[gk] = (set(), {})
+        seen, best_by_date_nights = group
+
+        k = _offer_key(o)
+        if k in seen:
+            continue
+        seen.add(k)
 
-        # 2) схлопуємо лише (date_from + nights): залишаємо найнижчу ціну
-        best_by_date_nights: Dict[Tuple[str, str], Dict[str, Any]] = {}
-        for o in uniq:
-            d = str(o.get("date_from") or "")
-            nights = str(o.get("duration") or o.get("hnight") or "")
-            key = (d, nights)
-
-            cur_best = best_by_date_nights.get(key)
-
-            v_new, _ = _pick_price(o.get("prices") or {}, currency_id)
-            v_best = None
-            if cur_best is not None:
-                v_best, _ = _pick_price(cur_best.get("prices") or {}, currency_id)
-
-            new_num = v_new if v_new is not None else 10**18
-            best_num = v_best if v_best is not None else 10**18
+        price = pick_price(o.get("prices") or {})
+        item = (price[0] if price[0] is not None else _NO_PRICE, price, o, o.get("duration") or o.get("hnight"))
+        key = k[:2]  # (date_from, nights) — уже зведені до str у _offer_key
+        cur_best = best_by_date_nights.get(key)
+        if cur_best is None or item[0] < cur_best[0]:
+            best_by_date_nights[key] = item
 
-            if cur_best is None or new_num < best_num:
-                best_by_date_nights[key] = o
+    # (ключ сортування — ціна головної пропозиції, як її показано в картці; головна; інші)
+    ranked = []
 
+    for _, best_by_date_nights in groups.values():
         uniq2 = list(best_by_date_nights.values())
-        if not uniq2:
-            continue
 
         # 3) сортуємо: дата ↑, ночі ↑
-        def nights_sort(o: Dict[str, Any]) -> int:
-            try:
-                return int(o.get("duration") or o.get("hnight") or 0)
-            except Exception:
-                return 0
-
-        uniq2.sort(key=lambda o: (_date_sort_key(o.get("date_from")), nights_sort(o)))
+        uniq2.sort(key=lambda item: (_date_sort_key(item[2].get("date_from")), _nights_sort(item[3])))
 
         # 4) головний — найнижча ціна з усіх варіантів
-        def price_num(o: Dict[str, Any]) -> float:
-            v, _ = _pick_price(o.get("prices") or {}, currency_id)
-            return v if v is not None else 10**18
-
-        main = min(uniq2, key=price_num)
-        others = [o for o in uniq2 if o is not main]
+        main = min(uniq2, key=lambda item: item[0])
+        # 5) обмеження: максимум 5 інших варіантів
+        others = [item for item in uniq2 if item is not main][:5]
 
-        main_caption, image_url = build_offer_caption(main, currency_id, include_people=True)
+        main_price = main[1][0]
+        ranked.append((int(main_price) if main_price is not None else _NO_PRICE, main, others))
 
-        # 5) обмеження: максимум 5 інших варіантів
-        others = others[:5]
+    # 10 найдешевших готелів (heapq стабільний, як sort + зріз); картки будуємо лише для них
+    messages: List[Tuple[str, Optional[str]]] = []
+    for _, main, others in heapq.nsmallest(10, ranked, key=itemgetter(0)):
+        main_caption, image_url = build_offer_caption(main[2], currency_id, include_people=True, price=main[1])
 
         if others:
             lines = [main_caption, ""]
-            for o in others:
+            for _, price, o, nights in others:
                 date_from = _fmt_date(o.get("date_from"))
-                nights = o.get("duration") or o.get("hnight") or "—"
-                price_val, sign = _pick_price(o.get("prices") or {}, currency_id)
-                price_str = f"{int(price_val):,}".replace(",", " ") + f" {sign}" if price_val is not None else "—"
-                lines.append(f"• 🗓️ {date_from} • 🛌 {nights} ноч.")
-                lines.append(f"💰 {price_str}")
+                lines.append(f"• 🗓️ {date_from} • 🛌 {nights or '—'} ноч.")
+                lines.append(f"💰 {_fmt_price(*price)}")
             caption = "\n".join(lines).strip()
         else:
             caption = main_caption
 
         messages.append((caption, image_url))
 
-    def msg_min_price_num(msg: Tuple[str, Optional[str]]) -> float:
-        cap = msg[0]
-        for line in cap.splitlines():
-            if line.strip().startswith("💰"):
-                digits = "".join(ch for ch in line if ch.isdigit())
-                try:
-                    return float(digits)
-                except Exception:
-                    return 10**18
-        return 10**18
-
-    messages.sort(key=msg_min_price_num)
-    return messages[:10]
+    return messages
@@ -1,11 +1,28 @@
 from datetime import datetime, timedelta
-from urllib.parse import urlencode
+from urllib.parse import quote_plus
+import json
 import logging
-import requests
+import time
+from collections import OrderedDict
+import aiohttp
 from typing import Optional, Tuple, Dict, Any
 
 from app.config import ITTOUR_API_TOKEN, ACCEPT_LANGUAGE
 
+try:
+    import orjson
+    _json_loads = orjson.loads  # відповіді search-list на сотні пропозицій розбираються в рази швидше
+except ImportError:
+    _json_loads = json.loads
+
+SEARCH_LIST_URL = "https://api.ittour.com.ua/module/search-list"
+REQUEST_TIMEOUT = 25  # секунд
+
+# Однакові пошуки (та сама країна/дати) від різних чатів у межах хвилини — без повторного HTTP.
+RESPONSE_CACHE_TTL = 60.0  # секунд
+_RESPONSE_CACHE_MAX = 256
+_RESPONSE_CACHE: "OrderedDict[Tuple, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
 
 CURRENCY_MAP = {
     "uah": 2,
@@ -25,7 +42,20 @@ CURRENCY_MAP = {
 
 
 def fmt_dmy(d: datetime) -> str:
-    return d.strftime("%d.%m.%y")
+    return f"{d.day:02d}.{d.month:02d}.{d.year % 100:02d}"
+
+
+def parse_dmy(s: str) -> datetime:
+    """
+    "DD.MM.YY" → datetime. Рядки з normalize_date_ddmmyy завжди такого вигляду —
+    розбираємо зрізами без strptime; інше віддаємо strptime (та сама семантика %y).
+    """
+    if len(s) == 8 and s[2] == "." and s[5] == ".":
+        dd, mm, yy = s[0:2], s[3:5], s[6:8]
+        if dd.isdigit() and mm.isdigit() and yy.isdigit():
+            y = int(yy)
+            return datetime(y + (2000 if y < 69 else 1900), int(mm), int(dd))
+    return datetime.strptime(s, "%d.%m.%y")
 
 
 def _normalize_ittour_response(data: Any) -> Dict[str, Any]:
@@ -146,12 +176,12 @@ def build_search_list_query(
     items_per_page = items_per_page or 10
 
     if date_from_str:
-        date_from = datetime.strptime(date_from_str, "%d.%m.%y")
+        date_from = parse_dmy(date_from_str)
     else:
         date_from = today + timedelta(days=2)
 
     if date_till_str:
-        date_till = datetime.strptime(date_till_str, "%d.%m.%y")
+        date_till = parse_dmy(date_till_str)
     else:
         date_till = date_from + timedelta(days=12)
 
@@ -199,46 +229,39 @@ def build_search_list_query(
     if budget_to is not None:
         params["price_till"] = int(budget_to)
 
-    base = "https://api.ittour.com.ua/module/search-list"
-    url = f"{base}?{urlencode(params)}"
+    # ключі фіксовані й ASCII, більшість значень — int: екрануємо лише рядкові значення
+    query = "&".join([
+        f"{k}={quote_plus(v) if type(v) is str else v}" for k, v in params.items()
+    ])
+    url = f"{SEARCH_LIST_URL}?{query}"
     return url, params
 
 
-def request_search_list(params: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Завжди повертає dict.
-    Якщо ITTour повернув помилку — dict гарантовано має:
-      error, error_desc, error_code
-    """
-    headers = {
+def _headers() -> Dict[str, str]:
+    return {
         # ✅ ВАЖЛИВО: за документацією ITTour це "Authorization: <token>" (без Bearer)
         "Authorization": ITTOUR_API_TOKEN,
         "Accept-Language": ACCEPT_LANGUAGE,
     }
 
-    resp = requests.get(
-        "https://api.ittour.com.ua/module/search-list",
-        params=params,
-        headers=headers,
-        timeout=25,
-    )
 
-    try:
-        data_raw = resp.json()
-    except Exception:
-        logging.exception("ITTour: invalid JSON response")
-        return {
-            "error": "Invalid JSON",
-            "error_desc": f"HTTP {resp.status_code}, cannot decode JSON",
-            "error_code": 110,
-            "raw": (resp.text or "")[:1000],
-        }
+def _invalid_json(status: int, text: str) -> Dict[str, Any]:
+    logging.exception("ITTour: invalid JSON response")
+    return {
+        "error": "Invalid JSON",
+        "error_desc": f"HTTP {status}, cannot decode JSON",
+        "error_code": 110,
+        "raw": (text or "")[:1000],
+    }
 
+
+def _finish_response(data_raw: Any, status: int) -> Dict[str, Any]:
+    """Приведення відповіді до dict, формат помилки, логування."""
     data = _normalize_ittour_response(data_raw)
-    data = _ensure_error_shape(data, http_status=resp.status_code)
+    data = _ensure_error_shape(data, http_status=status)
 
-    if resp.status_code != 200:
-        logging.error("ITTour: HTTP %s body=%s", resp.status_code, data)
+    if status != 200:
+        logging.error("ITTour: HTTP %s body=%s", status, data)
 
     # якщо є помилка — лог з кодом (щоб легко шукати по журналу)
     if isinstance(data, dict) and ("error" in data or "error_code" in data):
@@ -251,3 +274,77 @@ def request_search_list(params: Dict[str, Any]) -> Dict[str, Any]:
         )
 
     return data
+
+
+def _cache_key(params: Dict[str, Any]) -> Tuple:
+    return tuple(sorted(params.items()))
+
+
+def _cache_get(key: Tuple) -> Optional[Dict[str, Any]]:
+    hit = _RESPONSE_CACHE.get(key)
+    if hit is None:
+        return None
+    expires, data = hit
+    if expires < time.monotonic():
+        del _RESPONSE_CACHE[key]
+        return None
+    _RESPONSE_CACHE.move_to_end(key)
+    return dict(data)
+
+
+def _cache_put(key: Tuple, data: Dict[str, Any], status: int) -> None:
+    # помилки (ліміти, 401, таймаути на боці ITTour) не кешуємо — наступний запит має шанс пройти
+    if status != 200 or "error" in data or "error_code" in data:
+        return
+    _RESPONSE_CACHE[key] = (time.monotonic() + RESPONSE_CACHE_TTL, data)
+    _RESPONSE_CACHE.move_to_end(key)
+    if len(_RESPONSE_CACHE) > _RESPONSE_CACHE_MAX:
+        _RESPONSE_CACHE.popitem(last=False)
+
+
+# Одна aiohttp-сесія на процес: keep-alive до api.ittour.com.ua замість нового TLS на кожен пошук.
+_SESSION: Optional[aiohttp.ClientSession] = None
+
+
+def _session() -> aiohttp.ClientSession:
+    # створюємо ліниво — сесія має належати циклу, що вже працює
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        _SESSION = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+            connector=aiohttp.TCPConnector(ttl_dns_cache=300, keepalive_timeout=75),
+        )
+    return _SESSION
+
+
+async def request_search_list_async(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Завжди повертає dict.
+    Якщо ITTour повернув помилку — dict гарантовано має:
+      error, error_desc, error_code
+    Не займає потік і перевикористовує з'єднання спільної сесії.
+    """
+    key = _cache_key(params)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+
+    async with _session().get(SEARCH_LIST_URL, params=params, headers=_headers()) as resp:
+        body = await resp.read()
+        status = resp.status
+
+    try:
+        data_raw = _json_loads(body)
+    except Exception:
+        return _invalid_json(status, body.decode("utf-8", "replace"))
+
+    data = _finish_response(data_raw, status)
+    _cache_put(key, data, status)
+    return data
+
+
+async def close_session() -> None:
+    global _SESSION
+    if _SESSION is not None:
+        await _SESSION.close()
+        _SESSION = None
@@ -1,27 +1,234 @@
 from __future__ import annotations
+import asyncio
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
 from typing import Dict, Any, Optional
-from collections import defaultdict
+from collections import OrderedDict
 
-_STATE: Dict[int, Dict[str, Any]] = defaultdict(dict)
+from app.config import STATE_DB
+
+# Обмежений LRU: state давно неактивних чатів витісняється, пам'ять не росте з кількістю чатів.
+MAX_CHATS = 10_000
+# Чат без активності довше за TTL починає з чистого state (покинуті діалоги не тримаємо).
+STATE_TTL = 3600.0  # секунд
+_STATE: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+_SEEN: Dict[int, float] = {}  # chat_id -> time.monotonic() останнього звернення
+
+# ---------------------------
+# SQLite (опційно, STATE_DB)
+# ---------------------------
+# Збереження між рестартами: незавершені діалоги не губляться при деплої. Пам'ять лишається
+# єдиним джерелом правди процесу; у SQLite state пишеться у фоні (write-behind), а читається
+# лише load() — у потоці, до обробки апдейту, тож get/set диск не чіпають. Спільним сховищем
+# для кількох процесів це не є.
+
+_DB: Optional[sqlite3.Connection] = None
+_WRITES: "queue.SimpleQueue[Optional[tuple]]" = queue.SimpleQueue()
+_WRITER: Optional[threading.Thread] = None
+# chat_id -> останній знімок у черзі (None — видалення), ще не записаний у SQLite:
+# чат, витіснений з LRU до запису, читається звідси, а не з застарілого рядка
+_PENDING: Dict[int, Optional[str]] = {}
+_PENDING_LOCK = threading.Lock()
+_DB_LOCK = threading.Lock()  # з'єднання для читання одне на потоки asyncio.to_thread
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS state (chat_id INTEGER PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS state_updated_at ON state (updated_at)",
+)
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(STATE_DB, isolation_level=None, check_same_thread=False)
+    # WAL: читання не чекають на фоновий запис
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    for stmt in _SCHEMA:
+        conn.execute(stmt)
+    return conn
+
+
+def _db() -> sqlite3.Connection:
+    # з'єднання створюємо ліниво — лише коли справді є що читати
+    global _DB
+    if _DB is None:
+        _DB = _connect()
+    return _DB
+
+
+def _writer_loop() -> None:
+    conn = _connect()
+    while True:
+        item = _WRITES.get()
+        batch = [item]
+        # усе, що встигло накопичитись, — однією транзакцією
+        while item is not None:
+            try:
+                item = _WRITES.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+        try:
+            conn.execute("BEGIN")
+            for it in batch:
+                if it is None:
+                    continue
+                chat_id, data, ts = it
+                if data is None:
+                    conn.execute("DELETE FROM state WHERE chat_id = ?", (chat_id,))
+                else:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO state (chat_id, data, updated_at) VALUES (?, ?, ?)",
+                        (chat_id, data, ts),
+                    )
+            # прострочені чати на диску не потрібні — файл не росте з кожним чатом
+            conn.execute("DELETE FROM state WHERE updated_at < ?", (time.time() - STATE_TTL,))
+            conn.execute("COMMIT")
+            with _PENDING_LOCK:
+                for it in batch:
+                    # знімок міг оновитись, поки батч писався, — тоді лишаємо новіший
+                    if it is not None and it[0] in _PENDING and _PENDING[it[0]] is it[1]:
+                        del _PENDING[it[0]]
+        except Exception:
+            logging.exception("state: не вдалось записати state у SQLite")
+            try:
+                conn.execute("ROLLBACK")
+            except Exception:
+                pass
+        if batch[-1] is None:
+            break
+    conn.close()
+
+
+def _persist(chat_id: int, st: Optional[Dict[str, Any]]) -> None:
+    # знімок серіалізуємо одразу: далі dict може змінитись. Без default=str — значення,
+    # що не серіалізується в JSON, дає TypeError тут, а не мовчки стає рядком після рестарту
+    if not STATE_DB:
+        return
+    global _WRITER
+    if _WRITER is None:
+        _WRITER = threading.Thread(target=_writer_loop, name="state-writer", daemon=True)
+        _WRITER.start()
+    data = None if st is None else json.dumps(st, ensure_ascii=False)
+    with _PENDING_LOCK:
+        _PENDING[chat_id] = data
+    _WRITES.put((chat_id, data, time.time()))
+
+
+def _load(chat_id: int) -> Optional[Dict[str, Any]]:
+    if not STATE_DB:
+        return None
+    with _PENDING_LOCK:
+        if chat_id in _PENDING:
+            data = _PENDING[chat_id]
+            return None if data is None else json.loads(data)
+    try:
+        with _DB_LOCK:
+            row = _db().execute("SELECT data, updated_at FROM state WHERE chat_id = ?", (chat_id,)).fetchone()
+    except Exception:
+        logging.exception("state: не вдалось прочитати state з SQLite")
+        return None
+    if row is None or row[1] < time.time() - STATE_TTL:
+        return None
+    return json.loads(row[0])
+
+
+async def load(chat_id: int) -> None:
+    """
+    Підтягує state чату з SQLite у пам'ять, якщо його там немає (після рестарту чи витіснення).
+    SELECT іде в потоці — event loop не чекає на диск. Викликати до get/set (middleware у bot.py).
+    """
+    if not STATE_DB or chat_id in _STATE:
+        return
+    st = await asyncio.to_thread(_load, chat_id)
+    if st is not None and chat_id not in _STATE:
+        _store(chat_id, st, time.monotonic())
+
+
+def close() -> None:
+    """Дописує чергу в SQLite і зупиняє фоновий запис (викликати при завершенні)."""
+    global _WRITER
+    if _WRITER is not None:
+        _WRITES.put(None)
+        _WRITER.join(timeout=5)
+        _WRITER = None
+
+# ---------------------------
+# LRU
+# ---------------------------
+
+def _evict(now: float) -> None:
+    # порядок _STATE — від найдавнішого звернення, тож прострочені завжди на початку
+    cutoff = now - STATE_TTL
+    while _STATE:
+        oldest = next(iter(_STATE))
+        if len(_STATE) <= MAX_CHATS and _SEEN[oldest] >= cutoff:
+            break
+        del _STATE[oldest]
+        del _SEEN[oldest]
+
+def _store(chat_id: int, st: Dict[str, Any], now: float) -> Dict[str, Any]:
+    _STATE[chat_id] = st
+    _STATE.move_to_end(chat_id)
+    _SEEN[chat_id] = now
+    _evict(now)
+    return st
+
+def _touch(chat_id: int) -> Dict[str, Any]:
+    now = time.monotonic()
+    st = _STATE.get(chat_id)
+    if st is None or _SEEN[chat_id] < now - STATE_TTL:
+        st = {}
+    return _store(chat_id, st, now)
 
 def get(chat_id: int) -> Dict[str, Any]:
-    return _STATE[chat_id]
+    """
+    Live state чату. Для невідомого/простроченого чату — порожній dict без запису в сховище:
+    саме читання (спам, випадкові апдейти) не займає місце в LRU. Писати — через set/update.
+    Лише пам'ять: збережений у SQLite state підтягує load().
+    """
+    st = _STATE.get(chat_id)
+    now = time.monotonic()
+    if st is None:
+        return {}
+    if _SEEN[chat_id] < now - STATE_TTL:
+        clear(chat_id)
+        return {}
+    _STATE.move_to_end(chat_id)
+    _SEEN[chat_id] = now
+    return st
 
 def set(chat_id: int, **kwargs):
-    _STATE[chat_id].update(kwargs)
+    st = _touch(chat_id)
+    _persist(chat_id, {**st, **kwargs})  # до зміни: несеріалізоване значення не потрапляє й у пам'ять
+    st.update(kwargs)
+
+def update(chat_id: int, **kwargs) -> Dict[str, Any]:
+    """
+    Як set, але повертає оновлений state — без окремого get після запису.
+    """
+    st = _touch(chat_id)
+    _persist(chat_id, {**st, **kwargs})
+    st.update(kwargs)
+    return st
 
 def clear(chat_id: int):
     _STATE.pop(chat_id, None)
+    _SEEN.pop(chat_id, None)
+    _persist(chat_id, None)
 
 def reset(chat_id: int, *, keep: Optional[list[str]] = None) -> Dict[str, Any]:
     """
     Скидає state для чату. Можна зберегти певні ключі (наприклад from_city_id).
     """
     keep = keep or []
-    prev = _STATE.get(chat_id, {}) or {}
+    prev = _touch(chat_id)
     new_state: Dict[str, Any] = {}
     for k in keep:
         if k in prev:
             new_state[k] = prev[k]
-    _STATE[chat_id] = new_state
-    return new_state
+    _persist(chat_id, new_state)
+    return _store(chat_id, new_state, time.monotonic())
@@ -12,10 +12,8 @@ def clamp_date_range(date_from: datetime, date_till: datetime, max_days: int = 1
     return date_from, date_till, changed
 
 def validate_required(params: Dict[str, Any]) -> Optional[str]:
-    for f in REQUIRED_FIELDS:
-        if f not in params or params[f] in (None, "", 0):
-            return f
-    return None
+    # поля — непорожні рядки або додатні int, тож "порожнє" = falsy (None, "", 0)
+    return next((f for f in REQUIRED_FIELDS if not params.get(f)), None)
 
 def normalize_dates(df: str, dt: str) -> Tuple[str,str]:
     return df, dt